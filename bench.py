@@ -0,0 +1,235 @@
+import os
+import sys
+import json
+import logging
+import time
+import types
+import argparse
+import tempfile
+import threading
+import functools
+import http.server
+import numpy as np
+import pandas as pd
+import views
+
+# headless benchmark of main.py: streamlit is replaced by a stub, the data comes from generated fixture csv files
+# served by a local http server, and the script is run once cold and then once for every option of every selectbox
+# (widgets that only show up for some choice, like the ones of each section, are explored under that choice)
+# python bench.py --output bench_results.json [--baseline old_results.json] [--memory]
+# python bench.py --charts compares build time and payload of the full and compact chart modes instead
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+
+
+def write_fixtures(path, countries=185, years=range(1975, 2017), seed=0):
+    # synthetic files with the same columns as the real ones, sized like them by default
+    rng = np.random.default_rng(seed)
+    iso3 = ['C{:03d}'.format(i) for i in range(countries)]
+    names = ['Country {}'.format(i) for i in range(countries)]
+    pd.DataFrame({'iso3c': iso3, 'country_name': names}).to_csv(os.path.join(path, 'iso.csv'))
+
+    nutrition = pd.DataFrame({'iso3': iso3, 'age': 999, 'female': 999, 'urban': 999, 'edu': 999, 'year': 2018})
+    for column in views.FOODS:
+        nutrition[column] = rng.random(countries) * 10
+    for column in views.MICRONUTRIENTS + views.MACRONUTRIENTS + ['Dietary Sodium']:
+        nutrition[column] = rng.random(countries) * 50
+    nutrition['sum_food'] = nutrition[views.FOODS].sum(axis=1)
+    nutrition.to_csv(os.path.join(path, 'nutrition_percent.csv'))
+    nutrition.to_csv(os.path.join(path, 'nutrition_total.csv'))
+
+    rows = []
+    for year in years:
+        for gender in ['female', 'male']:
+            label = 'Prevalence of obesity, {0} (% of {0} population ages 18+)'.format(gender)
+            for code, name in list(zip(iso3, names)) + [('WLD', 'World')]:
+                rows.append({'Country Name': name, 'Country Code': code, 'Indicator Name': label,
+                             'Indicator Code': 'NCD_BMI_30', 'Disaggregation': gender, 'Year': year,
+                             'Value': rng.random() * 40})
+    pd.DataFrame(rows).to_csv(os.path.join(path, 'Prevalence of obesity (% of population ages 18+).csv'), index=False)
+
+    for filename, columns in [('nutrition_and_obesity_food_reg.csv', views.FOODS),
+                              ('nutrition_and_obesity_macro.csv', views.MACRONUTRIENTS + ['Dietary Sodium'])]:
+        frame = pd.DataFrame({'Country Name': names * 2, 'iso3': iso3 * 2,
+                              'female': [1] * countries + [0] * countries, 'Value': rng.random(2 * countries) * 40})
+        for column in columns:
+            frame[column] = rng.random(2 * countries) * 10
+        frame.to_csv(os.path.join(path, filename))
+
+    excess = pd.DataFrame({'Country': names, 'iso3c': iso3,
+                           'COVID-19 deaths': rng.integers(10, 100000, countries),
+                           'Excess deaths': rng.integers(-500, 1000000, countries),
+                           'Excess per 100k': rng.random(countries) * 500,
+                           'Undercount ratio': rng.random(countries) * 10})
+    excess.to_csv(os.path.join(path, 'excess_mortality.csv'), index=False)
+    covid = excess[['Country', 'Excess deaths']].copy()
+    for column in views.MICRONUTRIENTS + views.MACRONUTRIENTS:
+        covid[column] = rng.random(countries) * 50
+    covid.to_csv(os.path.join(path, 'nutrition_and_covid.csv'))
+
+
+def serve(path):
+    # local stand-in for the GitHub raw urls
+    class Handler(http.server.SimpleHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(Handler, directory=path))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class StubStreamlit(types.ModuleType):
+    # just enough of the streamlit api for main.py; widgets return the option chosen by the benchmark
+    def __init__(self):
+        super().__init__('streamlit')
+        self.choices = {}
+        self.widgets = {} #widgets of the last run and their options
+        self.caches = {}
+        self.sidebar = self
+
+    def cache(self, function=None, **kwargs):
+        def decorator(function):
+            memo = self.caches.setdefault(function.__qualname__, {}) #like st.cache, survives the rerun that redefines the function
+
+            @functools.wraps(function)
+            def wrapper(*args):
+                if args not in memo:
+                    memo[args] = function(*args)
+                return memo[args]
+            return wrapper
+        return decorator(function) if function is not None else decorator
+
+    def selectbox(self, label, options, index=0, format_func=str, **kwargs):
+        options = list(options)
+        self.widgets[label] = options
+        return self.choices.get(label, options[index])
+
+    radio = selectbox
+
+    def multiselect(self, label, options, default=None, **kwargs):
+        return self.choices.get(label, list(default or []))
+
+    def slider(self, label, min_value=None, max_value=None, value=None, **kwargs):
+        return self.choices.get(label, value)
+
+    def select_slider(self, label, options, value=None, **kwargs):
+        options = list(options)
+        self.widgets[label] = options
+        return self.choices.get(label, options[0] if value is None else value)
+
+    def checkbox(self, label, value=False, **kwargs):
+        return self.choices.get(label, value)
+
+    def experimental_get_query_params(self):
+        return {}
+
+    def plotly_chart(self, figure, *args, **kwargs):
+        return figure.to_json() #streamlit serializes every figure it shows
+
+    def __getattr__(self, name):
+        # st.write, st.markdown, st.dataframe, ...: output only, nothing to do
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: None
+
+
+def run(code, stub, choices=None):
+    import profiling
+    stub.choices = choices or {}
+    stub.widgets = {}
+    start = time.perf_counter()
+    exec(code, {'__name__': '__main__', '__file__': MAIN})
+    return {'seconds': time.perf_counter() - start, 'sections': profiling.records()}
+
+
+def explore(code, stub, choices, explored, scenarios, repeat):
+    # every option of every widget seen in the last run, then the widgets that these options bring up
+    for label, options in list(stub.widgets.items()):
+        if label in explored:
+            continue
+        explored.add(label)
+        for option in options:
+            option_choices = dict(choices, **{label: option})
+            timings = [run(code, stub, option_choices) for _ in range(repeat)]
+            scenarios.append({'widget': label, 'option': str(option),
+                              'choices': {key: str(value) for key, value in option_choices.items()},
+                              'seconds': min(timing['seconds'] for timing in timings),
+                              'sections': timings[0]['sections']})
+            explore(code, stub, option_choices, explored, scenarios, repeat)
+
+
+def compare_charts(countries=185, repeat=5):
+    # build time (fastest of `repeat`) and figure json size of every map/ranking/scatter chart in both modes
+    import plots
+    fixtures = tempfile.mkdtemp(prefix='examen-fixtures-')
+    write_fixtures(fixtures, countries)
+    covid = views.covid(pd.read_csv(os.path.join(fixtures, 'excess_mortality.csv')))
+    macro = views.female_only(pd.read_csv(os.path.join(fixtures, 'nutrition_and_obesity_macro.csv')))
+    micro = pd.read_csv(os.path.join(fixtures, 'nutrition_and_covid.csv'))
+    charts = {'excess mortality map': lambda compact: plots.excess_map(covid['map'], compact)}
+    for option, column in views.COVID_RANKINGS.items():
+        charts['ranking: ' + option] = functools.partial(plots.ranking_bar, covid['rankings'][option], column)
+    charts['macronutrient scatter'] = functools.partial(plots.nutrient_scatter, macro, 'Value', 'Added sugars',
+                                                        'Country Name', '', '', '')
+    charts['micronutrient scatter'] = functools.partial(plots.nutrient_scatter, micro, 'Excess deaths', 'Zinc',
+                                                        'Country', '', '', '', True)
+    rows = []
+    for name, build in charts.items():
+        for mode, compact in [('full', False), ('compact', True)]:
+            seconds = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                fig = build(compact=compact)
+                seconds.append(time.perf_counter() - start)
+            rows.append({'chart': name, 'mode': mode, 'build_seconds': min(seconds),
+                         'payload_bytes': len(fig.to_json()), 'traces': len(fig.data)})
+    table = pd.DataFrame(rows).pivot(index='chart', columns='mode')
+    print(table.to_string(float_format='{:.4f}'.format))
+    return rows
+
+
+def benchmark(output, baseline=None, countries=185, repeat=1, memory=False):
+    fixtures = tempfile.mkdtemp(prefix='examen-fixtures-')
+    write_fixtures(fixtures, countries)
+    server = serve(fixtures)
+    os.environ['EXAMEN_DATA_URL'] = 'http://127.0.0.1:{}/'.format(server.server_address[1])
+    os.environ['EXAMEN_SNAPSHOT_DIR'] = tempfile.mkdtemp(prefix='examen-snapshots-')
+    os.environ['EXAMEN_OFFLINE'] = '0'
+    os.environ['EXAMEN_PROFILE'] = 'memory' if memory else '1'
+    logging.getLogger('examen.profiling').addHandler(logging.NullHandler()) #the records end up in the results file instead
+    stub = StubStreamlit()
+    sys.modules['streamlit'] = stub
+    with open(MAIN) as f:
+        code = compile(f.read(), MAIN, 'exec')
+
+    results = {'countries': countries, 'cold_start': run(code, stub), 'warm_rerun': run(code, stub), 'scenarios': []}
+    explore(code, stub, {}, set(), results['scenarios'], repeat)
+    server.shutdown()
+
+    summary = pd.DataFrame(results['scenarios']).groupby('widget')['seconds'].agg(['count', 'mean', 'max'])
+    results['summary'] = summary.to_dict(orient='index')
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=1)
+    print('cold start {:.3f}s, warm rerun {:.3f}s'.format(results['cold_start']['seconds'], results['warm_rerun']['seconds']))
+    print(summary.to_string(float_format='{:.4f}'.format))
+    if baseline:
+        with open(baseline) as f:
+            old = pd.DataFrame(json.load(f)['summary']).T['mean']
+        print('\nmean rerun time relative to {}:'.format(baseline))
+        print((summary['mean'] / old).dropna().to_string(float_format='{:.2f}x'.format))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Headless benchmark of every selectbox option of main.py.')
+    parser.add_argument('--output', help='results file (default: bench_results.json, chart_results.json with --charts)')
+    parser.add_argument('--baseline', help='earlier results file to compare against')
+    parser.add_argument('--countries', type=int, default=185, help='number of countries in the fixture files')
+    parser.add_argument('--repeat', type=int, default=1, help='runs per option, the fastest one is kept')
+    parser.add_argument('--memory', action='store_true', help='also record peak memory per section (much slower)')
+    parser.add_argument('--charts', action='store_true', help='only compare the full and compact chart modes')
+    args = parser.parse_args()
+    if args.charts: #its own results file, so that it never overwrites a benchmark used as --baseline
+        with open(args.output or 'chart_results.json', 'w') as f:
+            json.dump(compare_charts(args.countries, max(args.repeat, 5)), f, indent=1)
+    else:
+        benchmark(args.output or 'bench_results.json', args.baseline, args.countries, args.repeat, args.memory)
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+# Pearson and Spearman correlations of many columns against one target in a single numpy pass
+# missing values are handled pairwise through a mask, so every column uses all the rows it has data for
+# confidence intervals come from a percentile bootstrap that resamples all the columns at once
+
+
+def _pearson(x, y, mask):
+    # x, y, mask: (..., rows, columns); returns (..., columns)
+    n = mask.sum(axis=-2)
+    x = np.where(mask, x, 0.0)
+    y = np.where(mask, y, 0.0)
+    x = np.where(mask, x - x.sum(axis=-2, keepdims=True) / n[..., None, :], 0.0)
+    y = np.where(mask, y - y.sum(axis=-2, keepdims=True) / n[..., None, :], 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        r = (x * y).sum(axis=-2) / np.sqrt((x * x).sum(axis=-2) * (y * y).sum(axis=-2))
+    return np.clip(r, -1.0, 1.0)
+
+
+def _rank(values, mask):
+    # average ranks among the valid rows; invalid rows are pushed to the end and then masked out anyway
+    return stats.rankdata(np.where(mask, values, np.inf), axis=-2)
+
+
+def _statistic(method, x, y, mask):
+    if method == 'spearman':
+        return _pearson(_rank(x, mask), _rank(y, mask), mask)
+    return _pearson(x, y, mask)
+
+
+def _p_values(r, n):
+    # two-sided t-test, the same one scipy uses in pearsonr and spearmanr
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t = r * np.sqrt((n - 2) / (1.0 - r * r))
+    return 2 * stats.t.sf(np.abs(t), n - 2)
+
+
+def _bootstrap(method, x, y, mask, n_boot, alpha, seed, chunk=100):
+    rng = np.random.default_rng(seed)
+    samples = []
+    for start in range(0, n_boot, chunk):
+        index = rng.integers(0, x.shape[0], size=(min(chunk, n_boot - start), x.shape[0]))
+        samples.append(_statistic(method, x[index], y[index], mask[index]))
+    samples = np.concatenate(samples)
+    return np.nanquantile(samples, alpha / 2, axis=0), np.nanquantile(samples, 1 - alpha / 2, axis=0)
+
+
+def correlate(df, columns, target, methods=('pearson', 'spearman'), n_boot=1000, alpha=0.05, seed=0):
+    # one row per (column, method): r, p value, bootstrap confidence interval and number of pairs used
+    columns = [column for column in columns if column in df.columns]
+    x = df[columns].to_numpy(dtype=float)
+    y = np.repeat(df[target].to_numpy(dtype=float)[:, None], len(columns), axis=1)
+    mask = ~np.isnan(x) & ~np.isnan(y)
+    n = mask.sum(axis=0)
+    tables = []
+    for method in methods:
+        r = _statistic(method, x, y, mask)
+        low, high = _bootstrap(method, x, y, mask, n_boot, alpha, seed)
+        tables.append(pd.DataFrame({'variable': columns, 'target': target, 'method': method, 'r': r,
+                                    'p_value': _p_values(r, n), 'ci_low': low, 'ci_high': high, 'n': n}))
+    return pd.concat(tables, ignore_index=True)
+
+
+def lookup(table, variable, method='pearson'):
+    return table[(table['variable'] == variable) & (table['method'] == method)].iloc[0]
+
+
+def strongest(table, method='pearson'):
+    table = table[table['method'] == method]
+    return table.iloc[np.argsort(-table['r'].abs().to_numpy(), kind='stable')].reset_index(drop=True)
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import views
+
+# obesity rates of every year, gender and country as one float32 array, built once from the World Bank long table
+# the countries of every (year, gender) are also kept sorted by rate, so a top-10 for any year is a slice of that order
+GENDERS = ['Female', 'Male']
+
+
+def _freeze(array):
+    array.flags.writeable = False
+    return array
+
+
+def _order(values):
+    # descending order along the country axis, missing rates last
+    return np.argsort(np.where(np.isnan(values), np.inf, -values), axis=-1, kind='stable')
+
+
+def _pivot(obesity):
+    obesity = obesity[obesity['Country Name'] != 'World'] #we need solely data by country (not total)
+    gender = obesity['Indicator Name'].astype(str).replace(views.OBESITY_LABELS)
+    obesity = obesity[gender.isin(GENDERS)].assign(gender=gender)
+    years = np.sort(obesity['Year'].unique()).astype(np.int16)
+    countries = np.sort(obesity['Country Name'].astype(str).unique())
+    values = np.full((len(years), len(GENDERS), len(countries)), np.nan, dtype=np.float32)
+    values[np.searchsorted(years, obesity['Year']),
+           np.searchsorted(GENDERS, obesity['gender']),
+           np.searchsorted(countries, obesity['Country Name'].astype(str))] = obesity['Value']
+    return years, countries, values
+
+
+def _position(labels, label, kind):
+    # exact lookup in a sorted axis; searchsorted alone would give the next label for a missing one
+    i = int(np.searchsorted(labels, label))
+    if i == len(labels) or labels[i] != label:
+        raise KeyError('no obesity data for {} {!r}'.format(kind, label))
+    return i
+
+
+class ObesityCube:
+    def __init__(self, years, countries, values, order=None):
+        self.years = _freeze(np.asarray(years))
+        self.countries = _freeze(np.asarray(countries))
+        self.values = _freeze(values)
+        self.order = _freeze(_order(values) if order is None else order)
+
+    @classmethod
+    def from_long(cls, obesity):
+        return cls(*_pivot(obesity))
+
+    def update(self, obesity):
+        # new cube with the years of `obesity` added (or replaced, if the cube already has them);
+        # only those years are pivoted and sorted, the others are reused as they are
+        years, countries, values = _pivot(obesity)
+        all_countries = np.union1d(self.countries, countries)
+        all_years = np.union1d(self.years, years).astype(np.int16)
+        merged = np.full((len(all_years), len(GENDERS), len(all_countries)), np.nan, dtype=np.float32)
+        order = np.empty(merged.shape, dtype=np.intp)
+        old = np.searchsorted(all_years, self.years)
+        new = np.searchsorted(all_years, years)
+        country_index = np.searchsorted(all_countries, self.countries)
+        merged[old[:, None, None], np.arange(len(GENDERS))[None, :, None], country_index[None, None, :]] = self.values
+        old_order = country_index[self.order] #old rankings stay valid, countries they lack are missing and go last
+        missing = np.setdiff1d(np.arange(len(all_countries)), country_index)
+        order[old] = np.concatenate([old_order, np.broadcast_to(missing, old_order.shape[:-1] + missing.shape)], axis=-1)
+        merged[new] = np.nan
+        merged[new[:, None, None], np.arange(len(GENDERS))[None, :, None],
+               np.searchsorted(all_countries, countries)[None, None, :]] = values
+        order[new] = _order(merged[new])
+        return ObesityCube(all_years, all_countries, merged, order)
+
+    def _index(self, year, gender):
+        return _position(self.years, year, 'year'), GENDERS.index(gender)
+
+    def rates(self, year, gender):
+        y, g = self._index(year, gender)
+        return self.values[y, g]
+
+    def top(self, year, gender, n=10):
+        # frame of the n highest rates in that year, from the precomputed order
+        y, g = self._index(year, gender)
+        index = self.order[y, g, :n]
+        index = index[~np.isnan(self.values[y, g, index])]
+        return pd.DataFrame({'Country Name': self.countries[index], 'Value': self.values[y, g, index]})
+
+    def mean(self, year, gender):
+        return float(np.nanmean(self.rates(year, gender)))
+
+    def trend(self, country, gender):
+        c = _position(self.countries, country, 'country')
+        return pd.Series(self.values[:, GENDERS.index(gender), c], index=self.years, name=country)
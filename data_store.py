@@ -0,0 +1,159 @@
+import os
+import sys
+import json
+import hashlib
+import io
+import tempfile
+import threading
+import urllib.request
+import urllib.error
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# local Parquet snapshots of the csv files the app reads from GitHub
+# EXAMEN_DATA_URL lets us point the store at a local stand-in server (python -m http.server)
+# EXAMEN_OFFLINE=1 never touches the network and only serves what is already on disk
+BASE_URL = os.environ.get('EXAMEN_DATA_URL', 'https://github.com/5htplife/dataforexamen1/raw/main/')
+SNAPSHOT_DIR = os.environ.get('EXAMEN_SNAPSHOT_DIR',
+                              os.path.join(os.path.dirname(os.path.abspath(__file__)), '.snapshots'))
+OFFLINE = os.environ.get('EXAMEN_OFFLINE', '') not in ('', '0')
+TIMEOUT = 20
+
+SOURCES = {
+    'excess_mortality': 'excess_mortality.csv',
+    'nutrition_percent': 'nutrition_percent.csv',
+    'nutrition_total': 'nutrition_total.csv',
+    'iso': 'iso.csv',
+    'nutrition_obesity_by_gender': 'nutrition_and_obesity_food_reg.csv',
+    'obesity': 'Prevalence of obesity (% of population ages 18+).csv',
+    'nutrition_and_covid': 'nutrition_and_covid.csv',
+    'macronutrition_and_obesity': 'nutrition_and_obesity_macro.csv',
+}
+
+
+def _snapshot_path(name):
+    return os.path.join(SNAPSHOT_DIR, name + '.parquet')
+
+
+def _meta_path(name):
+    return os.path.join(SNAPSHOT_DIR, name + '.json')
+
+
+def _read_meta(name):
+    try:
+        with open(_meta_path(name)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _source_url(name):
+    return BASE_URL.rstrip('/') + '/' + urllib.parse.quote(SOURCES[name])
+
+
+def _replace(path, write):
+    # write(file) goes to a temp file of its own that then replaces `path`: readers never see half a file,
+    # and two writers of the same snapshot (two sessions, or export.py next to the app) never share a temp file
+    fd, tmp = tempfile.mkstemp(dir=SNAPSHOT_DIR, prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def _write_snapshot(name, raw, headers):
+    # parse once, keep the typed table on disk
+    table = pa.Table.from_pandas(pd.read_csv(io.BytesIO(raw)), preserve_index=False)
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    _replace(_snapshot_path(name), lambda f: pq.write_table(table, f))
+    meta = {'url': _source_url(name),
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'version': hashlib.sha1(raw).hexdigest()}
+    _replace(_meta_path(name), lambda f: f.write(json.dumps(meta).encode()))
+
+
+def fetch(name):
+    # conditional GET: 304 keeps the snapshot, 200 replaces it
+    # returns 'fetched', 'not-modified', 'offline' or 'failed: ...' (the old snapshot stays usable on failure)
+    if OFFLINE:
+        return 'offline'
+    meta = _read_meta(name) if os.path.exists(_snapshot_path(name)) else {}
+    request = urllib.request.Request(_source_url(name))
+    if meta.get('etag'):
+        request.add_header('If-None-Match', meta['etag'])
+    if meta.get('last_modified'):
+        request.add_header('If-Modified-Since', meta['last_modified'])
+    try:
+        with urllib.request.urlopen(request, timeout=TIMEOUT) as response:
+            raw, headers = response.read(), response.headers
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return 'not-modified'
+        return 'failed: HTTP {}'.format(e.code)
+    except (urllib.error.URLError, OSError) as e:
+        return 'failed: {}'.format(e)
+    try:
+        _write_snapshot(name, raw, headers)
+    except (ValueError, pa.ArrowException, OSError) as e: #unparsable csv (pandas errors are ValueErrors) or disk errors
+        return 'failed: {}: {}'.format(type(e).__name__, e)
+    return 'fetched'
+
+
+def refresh_all(names=None, max_workers=8):
+    # fetch or revalidate every source at once instead of one after another
+    names = list(SOURCES) if names is None else list(names)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return dict(zip(names, pool.map(fetch, names)))
+
+
+def refresh_in_background(names=None, max_workers=8):
+    # sources without a snapshot are fetched before returning, there is nothing else to serve;
+    # the others are served from disk right away and revalidated in a background thread, so a slow
+    # upstream never delays the first render (a new version shows up in version() once it is written)
+    names = list(SOURCES) if names is None else list(names)
+    missing = [name for name in names if not os.path.exists(_snapshot_path(name))]
+    present = [name for name in names if name not in missing]
+    if present and not OFFLINE:
+        threading.Thread(target=refresh_all, args=(present, max_workers), daemon=True).start()
+    status = dict.fromkeys(present, 'offline' if OFFLINE else 'revalidating')
+    if missing:
+        status.update(refresh_all(missing, max_workers))
+    return status
+
+
+def load(name, columns=None):
+    # memory-mapped read of the snapshot; fetched on demand the first time a source is needed
+    # columns: list of columns to read, or a function that picks them from the column names on disk
+    path = _snapshot_path(name)
+    if not os.path.exists(path):
+        status = fetch(name)
+        if not os.path.exists(path):
+            raise FileNotFoundError('no snapshot for {!r} in {} ({})'.format(name, SNAPSHOT_DIR, status))
+    if callable(columns):
+        columns = columns(pq.read_schema(path).names)
+    return pq.read_table(path, columns=columns, memory_map=True).to_pandas()
+
+
+def load_partitioned(path, **filters):
+    # Parquet dataset partitioned by column (what ingest.py writes), e.g. load_partitioned('gdd', year=2018)
+    table = pq.read_table(path, memory_map=True,
+                          filters=[(column, '=', value) for column, value in filters.items()] or None)
+    return table.to_pandas()
+
+
+def version(name):
+    # content hash of the csv behind the snapshot, used to key anything derived from it
+    return _read_meta(name).get('version')
+
+
+if __name__ == '__main__':
+    #python data_store.py [name ...] refreshes the snapshots, e.g. to seed a container before running offline
+    for source, result in refresh_all(sys.argv[1:] or None).items():
+        print('{:<30} {}'.format(source, result))
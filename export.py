@@ -0,0 +1,199 @@
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import functools
+from concurrent.futures import ProcessPoolExecutor
+import plotly.io as pio
+import data_store
+import schema
+import views
+import regression
+import plots
+import cube
+
+# static export of the report: every figure of every widget choice rendered once, in parallel, to html/json/png
+# python export.py [output_dir] [--formats html json png] [--workers N] [--force]
+# output_dir/manifest.json lists every view with the dataset versions and chart mode it was rendered from,
+# so a re-export only renders the views whose datasets changed; main.py shows the exported json of a view
+# instead of building the figure whenever the manifest says it is up to date
+EXPORT_DIR = os.environ.get('EXAMEN_EXPORT_DIR',
+                            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'report')) #next to the code, like the snapshots
+MANIFEST = 'manifest.json'
+FORMATS = ['html', 'json', 'png'] #png needs kaleido (pip install kaleido==0.2.1)
+
+
+@functools.lru_cache(maxsize=None)
+def _prepared(name):
+    # the data a view is built from, loaded once per process
+    if name == 'food_habits':
+        return views.food_habits(schema.load('nutrition_percent'), schema.load('iso'))
+    if name == 'obesity_cube':
+        return cube.ObesityCube.from_long(schema.load('obesity'))
+    if name == 'covid':
+        return views.covid(schema.load('excess_mortality'))
+    if name == 'macro_female':
+        return views.female_only(schema.load('macronutrition_and_obesity'))
+    return schema.load(name)
+
+
+# kind of view: (datasets it depends on, figure builder taking the rest of the key)
+KINDS = {
+    'pie': (['nutrition_percent', 'iso'],
+            lambda iso3: plots.food_pie(_prepared('food_habits')['shares'][iso3])),
+    'obesity-top10': (['obesity'],
+                      lambda gender, year: plots.top_bar(_prepared('obesity_cube').top(int(year), gender), gender, year)),
+    'obesity-animation': (['obesity'],
+                          lambda gender: plots.top_animation(_prepared('obesity_cube'), gender)),
+    'food': (['nutrition_obesity_by_gender'],
+             lambda food, gender: plots.food_regression_plot(
+                 regression.subset(_prepared('nutrition_obesity_by_gender'), gender), food)),
+    'macronutrient': (['macronutrition_and_obesity'],
+                      lambda element: plots.macronutrient_scatter(_prepared('macro_female'), element)),
+    'micronutrient': (['nutrition_and_covid'],
+                      lambda element: plots.micronutrient_scatter(_prepared('nutrition_and_covid'), element)),
+    'covid': (['excess_mortality'],
+              lambda view: plots.covid_chart(_prepared('covid'), view)),
+}
+
+
+def key(kind, *args):
+    return '/'.join([kind] + [str(arg) for arg in args])
+
+
+def keys():
+    # every view of the report, one per widget choice
+    result = [key('pie', iso3) for iso3 in _prepared('food_habits')['countries']]
+    for gender in cube.GENDERS:
+        result += [key('obesity-top10', gender, year) for year in _prepared('obesity_cube').years]
+        result.append(key('obesity-animation', gender))
+    result += [key('food', food, gender) for food in views.FOODS for gender in regression.GENDERS]
+    result += [key('macronutrient', element) for element in views.MACRONUTRIENTS]
+    result += [key('micronutrient', element) for element in views.MICRONUTRIENTS]
+    result += [key('covid', view) for view in ['map'] + list(views.COVID_RANKINGS)]
+    return result
+
+
+def figure(view):
+    kind, *args = view.split('/')
+    return KINDS[kind][1](*args)
+
+
+CHART_MODE_KINDS = ['covid', 'macronutrient', 'micronutrient'] #views drawn differently with EXAMEN_CHARTS=full
+
+
+def _stamp(view):
+    # what the assets of a view depend on
+    kind = view.split('/')[0]
+    charts = ('compact' if plots.COMPACT else 'full') if kind in CHART_MODE_KINDS else None
+    return {'datasets': {name: data_store.version(name) for name in KINDS[kind][0]}, 'charts': charts}
+
+
+def _filename(view):
+    return re.sub(r'[^A-Za-z0-9-]+', '_', view)
+
+
+def render(view, output_dir, formats):
+    start = time.perf_counter()
+    fig = figure(view)
+    files = {}
+    for fmt in formats:
+        path = os.path.join(output_dir, fmt, _filename(view) + '.' + fmt)
+        if fmt == 'html':
+            fig.write_html(path, include_plotlyjs='cdn')
+        elif fmt == 'json':
+            fig.write_json(path)
+        else:
+            fig.write_image(path)
+        files[fmt] = os.path.relpath(path, output_dir)
+    return view, files, time.perf_counter() - start
+
+
+def _render(job):
+    return render(*job)
+
+
+def read_manifest(output_dir=EXPORT_DIR):
+    path = os.path.join(output_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_manifest(output_dir, manifest):
+    # written to a temporary file first, the live app may be reading it
+    path = os.path.join(output_dir, MANIFEST)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def export(output_dir=EXPORT_DIR, formats=('html', 'json'), workers=None, force=False, log=print):
+    start = time.perf_counter()
+    data_store.refresh_all()
+    _prepared.cache_clear() #the data may have changed since the last export in this process
+    old = read_manifest(output_dir)
+    manifest = {}
+    jobs = []
+    stale = [] #files no longer listed in the manifest
+    for view in keys():
+        entry = dict(_stamp(view), files=old.get(view, {}).get('files', {}))
+        manifest[view] = entry
+        up_to_date = (not force and view in old and old[view]['datasets'] == entry['datasets']
+                      and old[view]['charts'] == entry['charts'] and set(formats) <= set(entry['files'])
+                      and all(os.path.exists(os.path.join(output_dir, path)) for path in entry['files'].values()))
+        if not up_to_date:
+            stale += [path for fmt, path in entry['files'].items() if fmt not in formats]
+            entry['files'] = {}
+            jobs.append((view, output_dir, list(formats)))
+    for fmt in formats:
+        os.makedirs(os.path.join(output_dir, fmt), exist_ok=True)
+    for view in set(old) - set(manifest): #views that no longer exist, e.g. a country that left the data
+        stale += list(old[view]['files'].values())
+    for path in stale:
+        if os.path.exists(os.path.join(output_dir, path)):
+            os.remove(os.path.join(output_dir, path))
+
+    seconds = 0.0
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for view, files, render_seconds in pool.map(_render, jobs, chunksize=8): #neighbouring views share their data
+                manifest[view]['files'] = files
+                seconds += render_seconds
+    _write_manifest(output_dir, manifest)
+    log('{} views: {} rendered ({:.1f}s of rendering), {} up to date, {:.1f}s -> {}'.format(
+        len(manifest), len(jobs), seconds, len(manifest) - len(jobs), time.perf_counter() - start, output_dir))
+    return manifest
+
+
+def prerendered(view, build, output_dir=EXPORT_DIR):
+    # the exported figure of a view if it was rendered from the current datasets and chart mode, else build()
+    entry = read_manifest(output_dir).get(view)
+    if entry is not None and 'json' in entry['files'] and {field: entry[field] for field in ('datasets', 'charts')} == _stamp(view):
+        path = os.path.join(output_dir, entry['files']['json'])
+        if os.path.exists(path):
+            return pio.read_json(path)
+    return build()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render every view of the report to static files.')
+    parser.add_argument('output_dir', nargs='?', default=EXPORT_DIR)
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=['html', 'json'],
+                        help='png needs kaleido (default: html json)')
+    parser.add_argument('--workers', type=int, default=None, help='number of processes (default: one per CPU)')
+    parser.add_argument('--force', action='store_true', help='render every view, even the up to date ones')
+    args = parser.parse_args(argv)
+    if 'png' in args.formats:
+        try:
+            import kaleido #plotly's static image engine; better to fail here than in every worker
+        except ImportError:
+            parser.error('png export needs kaleido: pip install kaleido==0.2.1')
+    export(args.output_dir, args.formats, args.workers, args.force)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,132 @@
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+# builds the country-level nutrition table from the Global Dietary Database files (Country-level estimates/vNN_cnty.csv)
+# this replaces the copy-pasted read/filter/drop/rename/merge blocks of the preprocessing notebook
+# python ingest.py "GDD_FinalEstimates_01102022/Country-level estimates" gdd --years 2018
+
+KEYS = ['iso3', 'age', 'female', 'urban', 'edu', 'year']
+VARIABLES = {
+    'v01': 'fruits',
+    'v02': 'non-starchy vegetables',
+    'v03': 'potatoes',
+    'v05': 'beans and legumes',
+    'v06': 'nuts and seeds',
+    'v07': 'Refined grains',
+    'v08': 'Whole grains',
+    'v09': 'Total processed meats',
+    'v10': 'Unprocessed red meats',
+    'v11': 'Total seafoods',
+    'v12': 'Eggs',
+    'v13': 'Cheese',
+    'v14': 'Yoghurt (including fermented milk)',
+    'v15': 'Sugar-sweetened beverages',
+    'v16': 'Fruit juices',
+    'v17': 'Coffee',
+    'v18': 'Tea',
+    'v22': 'Total carbohydrates',
+    'v23': 'Total protein',
+    'v27': 'Saturated fat',
+    'v28': 'Monounsaturated fatty acids',
+    'v29': 'Total omega-6 fat',
+    'v30': 'Seafood omega-3 fat',
+    'v31': 'Plant omega-3 fat',
+    'v33': 'Dietary cholesterol',
+    'v34': 'Dietary fiber',
+    'v35': 'Added sugars',
+    'v36': 'Calcium',
+    'v37': 'Dietary Sodium',
+    'v38': 'Iodine',
+    'v39': 'Iron',
+    'v40': 'Magnesium',
+    'v41': 'Potassium',
+    'v42': 'Selenium',
+    'v43': 'Vitamin A',
+    'v46': 'Vitamin B2',
+    'v47': 'Vitamin B3',
+    'v48': 'Vitamin B6',
+    'v49': 'Vitamin B9',
+    'v50': 'Vitamin B12',
+    'v51': 'Vitamin C',
+    'v52': 'Vitamin D',
+    'v53': 'Vitamin E',
+    'v54': 'Zinc',
+    'v57': 'Total Milk',
+}
+
+
+def read_variable(path, column, years=None, chunksize=200000):
+    # only the key columns and the median are parsed, and rows of other years are dropped chunk by chunk
+    start = time.perf_counter()
+    chunks = []
+    for chunk in pd.read_csv(path, usecols=KEYS + ['median'], chunksize=chunksize):
+        if years is not None:
+            chunk = chunk[chunk['year'].isin(years)]
+        chunks.append(chunk)
+    frame = pd.concat(chunks, ignore_index=True).rename(columns={'median': column}).set_index(KEYS)
+    return frame, time.perf_counter() - start
+
+
+def _read_variable(job):
+    return read_variable(*job)
+
+
+def ingest(source_dir, output_dir, years=None, workers=None, chunksize=200000, log=print):
+    timings = {}
+    start = time.perf_counter()
+    jobs = []
+    for code, column in VARIABLES.items():
+        path = os.path.join(source_dir, code + '_cnty.csv')
+        if os.path.exists(path):
+            jobs.append((path, column, years, chunksize))
+        else:
+            log('missing {} ({})'.format(path, column))
+    if not jobs:
+        raise FileNotFoundError('no vNN_cnty.csv files of the Global Dietary Database in {}'.format(source_dir))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_read_variable, jobs))
+    for job, (_, seconds) in zip(jobs, results):
+        timings['read ' + os.path.basename(job[0])] = seconds
+    timings['read (wall)'] = time.perf_counter() - start
+
+    stage = time.perf_counter()
+    table = pd.concat([frame for frame, _ in results], axis=1, join='inner').reset_index() #one keyed join instead of a merge chain
+    timings['join'] = time.perf_counter() - stage
+
+    stage = time.perf_counter()
+    arrow_table = pa.Table.from_pandas(table, preserve_index=False)
+    #fixed file names and delete_matching: ingesting a year again replaces its partition instead of adding a second copy
+    ds.write_dataset(arrow_table, output_dir, format='parquet', basename_template='part-{i}.parquet',
+                     partitioning=ds.partitioning(pa.schema([arrow_table.schema.field('year')]), flavor='hive'),
+                     existing_data_behavior='delete_matching')
+    timings['write'] = time.perf_counter() - stage
+    timings['total'] = time.perf_counter() - start
+    for name, seconds in timings.items():
+        log('{:<30} {:8.3f}s'.format(name, seconds))
+    log('{} rows, {} variables -> {}'.format(len(table), len(results), output_dir))
+    return table, timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build the nutrition table from the Global Dietary Database country files.')
+    parser.add_argument('source_dir', help='folder with the vNN_cnty.csv files')
+    parser.add_argument('output_dir', help='where to write the Parquet dataset (partitioned by year)')
+    parser.add_argument('--years', nargs='+', default=['2018'], help="survey years to keep, or 'all' (default: 2018)")
+    parser.add_argument('--workers', type=int, default=None, help='number of processes (default: one per CPU)')
+    parser.add_argument('--chunksize', type=int, default=200000, help='rows parsed at a time')
+    args = parser.parse_args(argv)
+    years = None if args.years == ['all'] else [int(year) for year in args.years]
+    try:
+        ingest(args.source_dir, args.output_dir, years, args.workers, args.chunksize)
+    except FileNotFoundError as e:
+        parser.error(str(e))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,180 @@
+import os
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+from scipy import stats
+import views
+
+# light plotly replacements for the seaborn/matplotlib figures, and the map, ranking and scatter charts
+# the charts have two modes: 'full' is the original plotly express figure (one trace per country, full float64 data),
+# 'compact' (the default, EXAMEN_CHARTS=full switches it off) draws a single trace with rounded values and uses WebGL
+# for the scatters, which makes the figure json several times smaller
+COMPACT = os.environ.get('EXAMEN_CHARTS', 'compact') != 'full'
+PALETTE = np.array(px.colors.qualitative.Plotly) #the colors px gives to one trace per country
+RANKINGS = {'COVID-19 deaths': ('COVID-19 Confirmed Deaths by Country', 'Confirmed COVID-19 Deaths'),
+            'Excess per 100k': ('COVID-19 Excess Deaths per 100k by Country', 'Excess Deaths per 100k'),
+            'Undercount ratio': ('Undercount ratio by Country', 'Undercount ratio')}
+MAX_MARKER_SIZE = 20 #px default for size=
+
+
+def food_pie(shares):
+    return px.pie(shares, values='food', color='food', hover_name='food', names=shares.index,
+                  labels={'index': 'Type of Food', 'food': 'Per cent of Total Food Intake'},
+                  title='Food Habits in the Country')
+
+
+def regression_line(x, y, level=0.95, points=100):
+    # least squares line with the analytic confidence band of the mean (what regplot estimates by bootstrap)
+    keep = ~np.isnan(x) & ~np.isnan(y)
+    x, y = x[keep], y[keep]
+    n = len(x)
+    x_mean = x.mean()
+    sxx = ((x - x_mean) ** 2).sum()
+    slope = ((x - x_mean) * (y - y.mean())).sum() / sxx
+    intercept = y.mean() - slope * x_mean
+    s = np.sqrt(((y - intercept - slope * x) ** 2).sum() / (n - 2))
+    grid = np.linspace(x.min(), x.max(), points)
+    fit = intercept + slope * grid
+    margin = stats.t.ppf((1 + level) / 2, n - 2) * s * np.sqrt(1 / n + (grid - x_mean) ** 2 / sxx)
+    return grid, fit, fit - margin, fit + margin
+
+
+def food_regression_plot(df, food):
+    x = df['Value'].to_numpy(dtype=float)
+    y = df[food].to_numpy(dtype=float)
+    grid, fit, low, high = regression_line(x, y)
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=np.concatenate([grid, grid[::-1]]), y=np.concatenate([high, low[::-1]]),
+                             fill='toself', fillcolor='rgba(0, 0, 255, 0.15)', line=dict(width=0),
+                             hoverinfo='skip', name='95% confidence interval'))
+    fig.add_trace(go.Scatter(x=grid, y=fit, mode='lines', line=dict(color='blue'), name='Fit'))
+    fig.add_trace(go.Scatter(x=x, y=y, mode='markers', marker=dict(color='blue', symbol='star'), name=food))
+    fig.update_layout(title='Correlation between Obesity and The Chosen Food Type', showlegend=False,
+                      xaxis=dict(title='Obesity (%)'), yaxis=dict(title=food))
+    return fig
+
+
+def _rounded(values, digits=4):
+    # plotly writes every float with all its digits; float32 would not help as it is serialized through python floats
+    # rounded to `digits` significant digits of the largest value (and never to fewer than 2 decimals),
+    # so columns of small values keep their differences
+    values = np.asarray(values)
+    if values.dtype.kind in 'iu':
+        return values
+    values = values.astype(float)
+    finite = np.abs(values[np.isfinite(values)])
+    scale = finite.max() if len(finite) else 0.0
+    decimals = 2 if not scale else max(2, digits - 1 - int(np.floor(np.log10(scale))))
+    return np.round(values, decimals)
+
+
+def _colors(n):
+    return PALETTE[np.arange(n) % len(PALETTE)]
+
+
+def _size_marker(values):
+    values = np.asarray(values, dtype=float)
+    return dict(size=_rounded(values), sizemode='area', sizeref=np.nanmax(values) / MAX_MARKER_SIZE ** 2,
+                sizemin=0, color=_colors(len(values)))
+
+
+def excess_map(df, compact=COMPACT):
+    hover_columns = ['COVID-19 deaths', 'Excess deaths', 'Excess per 100k']
+    if compact:
+        fig = go.Figure(go.Scattergeo(
+            locations=df['iso3c'], hovertext=df['Country'], marker=_size_marker(df['size']),
+            customdata=np.column_stack([_rounded(df[column]) for column in hover_columns]),
+            hovertemplate='<b>%{hovertext}</b><br>' + '<br>'.join(
+                '{}=%{{customdata[{}]}}'.format(column, i) for i, column in enumerate(hover_columns)) + '<extra></extra>'))
+        fig.update_layout(geo=dict(projection_type='natural earth'), title='COVID-19 Excess Mortality around the Globe')
+    else:
+        fig = px.scatter_geo(df, locations='iso3c', color='Country',
+                             hover_name='Country',
+                             hover_data=['Country'] + hover_columns, size='size',
+                             projection='natural earth', title='COVID-19 Excess Mortality around the Globe')
+    fig.update_layout(width=800, height=800)
+    return fig
+
+
+def covid_chart(covid_views, view, compact=COMPACT):
+    # the map or one of the rankings of views.covid
+    if view == 'map':
+        return excess_map(covid_views['map'], compact)
+    return ranking_bar(covid_views['rankings'][view], views.COVID_RANKINGS[view], compact)
+
+
+def ranking_bar(df, column, compact=COMPACT):
+    title, label = RANKINGS[column]
+    if compact:
+        values = _rounded(df[column])
+        fig = go.Figure(go.Bar(x=df['Country'], y=values, marker=dict(color=values, coloraxis='coloraxis'),
+                               hovertemplate='Country=%{x}<br>' + label + '=%{y}<extra></extra>'))
+        fig.update_layout(title=title, coloraxis=dict(colorbar=dict(title=label)), yaxis=dict(title=label))
+    else:
+        fig = px.bar(df, x='Country', y=column, hover_data=[column], color=column, title=title, labels={column: label})
+    fig.update_layout(width=800, height=800, xaxis=dict(showgrid=False), yaxis=dict(showgrid=False))
+    return fig
+
+
+def nutrient_scatter(df, x, y, name, title, x_title, y_title, log_x=False, compact=COMPACT):
+    if compact:
+        fig = go.Figure(go.Scattergl(x=_rounded(df[x]), y=_rounded(df[y]), mode='markers', hovertext=df[name],
+                                     marker=_size_marker(df[y]),
+                                     hovertemplate='<b>%{hovertext}</b><br>' + x + '=%{x}<br>' + y + '=%{y}<extra></extra>'))
+    else:
+        fig = px.scatter(df, x=x, y=y, size=y, color=name, hover_name=name, log_x=log_x)
+    fig.update_layout(title=title, xaxis=dict(title=x_title, showgrid=False), yaxis=dict(title=y_title, showgrid=False))
+    if log_x:
+        fig.update_xaxes(type='log')
+    return fig
+
+
+def macronutrient_scatter(df, element, compact=COMPACT):
+    return nutrient_scatter(df, 'Value', element, 'Country Name',
+                            'Relationship between Obesity and Certain Macronutrient Intake for Women',
+                            'Obesity Rate (%)', 'Macronutrient Level', compact=compact)
+
+
+def micronutrient_scatter(df, element, compact=COMPACT):
+    return nutrient_scatter(df, 'Excess deaths', element, 'Country',
+                            'Relationship between Excess Deaths and Micronutrient Levels in the World',
+                            'Excess deaths (log)', 'Micronutrient Level', log_x=True, compact=compact)
+
+
+def _people(gender):
+    return 'women' if gender == 'Female' else 'men'
+
+
+def top_bar(top, gender, year):
+    fig = px.bar(top, y="Value", x="Country Name", hover_name="Country Name", text_auto='.2s',
+                 title="Obesity rates among {} in top-10 obesed countries in {}".format(_people(gender), year))
+    fig.update_traces(textfont_size=12, textangle=0, textposition="outside", cliponaxis=False)
+    fig.update_yaxes(range=[0, 100], title="Obesity Rate (%)")
+    return fig
+
+
+def top_animation(obesity_cube, gender, n=10):
+    # one frame per year with the top-n of that year, played by plotly in the browser
+    frames = []
+    for year in obesity_cube.years:
+        top = obesity_cube.top(year, gender, n)
+        frames.append(go.Frame(data=[go.Bar(x=top['Country Name'], y=_rounded(top['Value']), texttemplate='%{y:.2s}',
+                                            textposition='outside', cliponaxis=False)], name=str(year)))
+    fig = go.Figure(data=frames[-1].data, frames=frames)
+    fig.update_layout(
+        title='Top-{} obesity rates among {} over the years'.format(n, _people(gender)),
+        yaxis=dict(range=[0, 100], title='Obesity Rate (%)'), width=800, height=800,
+        updatemenus=[dict(type='buttons', showactive=False, x=0, y=-0.15, buttons=[
+            dict(label='Play', method='animate', args=[None, dict(frame=dict(duration=400), fromcurrent=True)])])],
+        sliders=[dict(active=len(frames) - 1, y=-0.1, steps=[
+            dict(label=frame.name, method='animate', args=[[frame.name], dict(mode='immediate', frame=dict(duration=0))])
+            for frame in frames])])
+    return fig
+
+
+def trend_lines(obesity_cube, countries, gender):
+    fig = go.Figure([go.Scatter(x=obesity_cube.years, y=_rounded(obesity_cube.trend(country, gender)), mode='lines',
+                                name=country) for country in countries])
+    fig.update_layout(title='Obesity rates among {} over the years'.format(_people(gender)),
+                      xaxis=dict(title='Year'), yaxis=dict(title='Obesity Rate (%)'))
+    return fig
@@ -0,0 +1,137 @@
+import os
+import time
+import json
+import logging
+import threading
+import functools
+import tracemalloc
+
+# per-section timings of a run of main.py, switched on with EXAMEN_PROFILE=1
+# every section records wall time, time spent in pandas work and in building figures
+# and the bytes of data sent to the browser; records go to the 'examen.profiling' logger as json lines
+# (on stderr, unless the logger already has a handler of its own)
+# EXAMEN_PROFILE=memory also records peak memory with tracemalloc, which makes everything several times slower
+ENABLED = os.environ.get('EXAMEN_PROFILE', '') not in ('', '0')
+MEMORY = os.environ.get('EXAMEN_PROFILE', '') == 'memory'
+logger = logging.getLogger('examen.profiling')
+if ENABLED and not logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False #one line per record, even when the root logger is configured too
+_state = threading.local() #streamlit runs every session in its own thread
+
+
+def _current():
+    return getattr(_state, 'section', None)
+
+
+def records():
+    # records of the current run, in the order the sections ran
+    return list(getattr(_state, 'records', []))
+
+
+def start_run():
+    _state.records = []
+    _state.section = None
+    if MEMORY and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def mark(name):
+    # closes the running section (if any) and starts the next one
+    if not ENABLED:
+        return
+    finish()
+    if MEMORY:
+        tracemalloc.reset_peak()
+    _state.section = {'section': name, 'wall': 0.0, 'pandas': 0.0, 'plotting': 0.0, 'peak_bytes': None,
+                      'payload_bytes': 0, 'started': time.perf_counter(),
+                      'memory_at_start': tracemalloc.get_traced_memory()[0] if MEMORY else 0}
+
+
+def finish():
+    section = _current()
+    if section is None:
+        return
+    section['wall'] = time.perf_counter() - section.pop('started')
+    memory_at_start = section.pop('memory_at_start')
+    if MEMORY:
+        section['peak_bytes'] = tracemalloc.get_traced_memory()[1] - memory_at_start
+    _state.section = None
+    if not hasattr(_state, 'records'):
+        _state.records = []
+    _state.records.append(section)
+    logger.info(json.dumps(section))
+
+
+def add(kind, amount):
+    section = _current()
+    if section is not None:
+        section[kind] += amount
+
+
+def _timers():
+    if not hasattr(_state, 'timers'):
+        _state.timers = []
+    return _state.timers
+
+
+def timed(kind, function):
+    # wraps a function so its run time counts towards `kind` ('pandas' or 'plotting') of the running section
+    # wrapped functions call each other (a plots builder calls px, Design.batch calls Design.fit): a call inside
+    # one of the same kind is not counted again, and the time of a call of the other kind (pandas work inside a
+    # figure builder) counts for that kind only, so pandas + plotting never exceeds the wall time
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        timers = _timers()
+        if any(timer[0] == kind for timer in timers):
+            return function(*args, **kwargs)
+        timer = [kind, 0.0] #kind, seconds spent in nested calls of the other kind
+        timers.append(timer)
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            timers.pop()
+            add(kind, seconds - timer[1])
+            if timers:
+                timers[-1][1] += seconds
+    return wrapper
+
+
+def instrument(module, names, kind):
+    # main.py runs again on every rerun, so functions that are already wrapped are left alone
+    for name in names:
+        function = getattr(module, name)
+        if not getattr(function, 'profiled', False):
+            wrapper = timed(kind, function)
+            wrapper.profiled = True
+            setattr(module, name, wrapper)
+
+
+def payload_size(obj):
+    # what streamlit serializes for the browser: figure json for plotly, the data itself for tables
+    if hasattr(obj, 'to_plotly_json'):
+        return len(obj.to_json())
+    if hasattr(obj, 'memory_usage'):
+        return int(obj.memory_usage(deep=True).sum())
+    return len(str(obj))
+
+
+def watch_output(module, names):
+    # counts the payload of every element call (st.plotly_chart, st.dataframe, ...) towards the running section
+    def watched(function):
+        @functools.wraps(function)
+        def wrapper(obj, *args, **kwargs):
+            add('payload_bytes', payload_size(obj))
+            return function(obj, *args, **kwargs)
+        return wrapper
+    for name in names:
+        function = getattr(module, name)
+        if not getattr(function, 'profiled', False):
+            wrapper = watched(function)
+            wrapper.profiled = True
+            setattr(module, name, wrapper)
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+# OLS of obesity on food intake, fitted live instead of shown as a screenshot
+# the design matrix with every candidate regressor is QR-factorized once; a model on a subset of the columns
+# only needs a small QR of the matching columns of R, so fitting hundreds of subsets stays cheap
+
+GENDERS = ['Both', 'Female', 'Male']
+RANK_TOLERANCE = 1e-10 #a column whose R diagonal is below this share of the largest one is a combination of the others
+
+
+def subset(df, gender):
+    if gender == 'Female':
+        return df[df['female'] == 1]
+    if gender == 'Male':
+        return df[df['female'] == 0]
+    return df
+
+
+class Design:
+    def __init__(self, df, candidates, target='Value'):
+        # listwise deletion once, so that every submodel is fitted on the same rows and can share the factorization
+        self.candidates = [column for column in candidates if column in df.columns and df[column].nunique() > 1]
+        data = df[self.candidates + [target]].dropna()
+        self.target = target
+        self.n = len(data)
+        x = np.column_stack([np.ones(self.n), data[self.candidates].to_numpy(dtype=float)])
+        y = data[target].to_numpy(dtype=float)
+        q, self.r = np.linalg.qr(x)
+        self.qty = q.T @ y
+        self.outside_rss = max(float(y @ y - self.qty @ self.qty), 0.0) #part of y that no subset can explain
+        self.tss = float(((y - y.mean()) ** 2).sum())
+        self.fits = {}
+
+    def _columns(self, variables):
+        return [0] + [self.candidates.index(column) + 1 for column in self.candidates if column in variables]
+
+    def problem(self, variables):
+        # why the model on these regressors cannot be estimated, or None if it can
+        columns = self._columns(variables)
+        if self.n <= len(columns):
+            return 'there are not more observations than coefficients'
+        diagonal = np.abs(np.diag(np.linalg.qr(self.r[:, columns])[1]))
+        if diagonal.min() <= RANK_TOLERANCE * diagonal.max():
+            return 'some regressors are linear combinations of the others'
+        return None
+
+    def fit(self, variables):
+        # memoized by the set of regressors; returns the coefficient table plus fit statistics,
+        # or None when problem() says the model cannot be estimated
+        variables = [column for column in self.candidates if column in variables]
+        key = tuple(variables)
+        if key not in self.fits:
+            self.fits[key] = None if self.problem(variables) else self._fit(variables)
+        return self.fits[key]
+
+    def _fit(self, variables):
+        columns = self._columns(variables)
+        q, r = np.linalg.qr(self.r[:, columns])
+        qtz = q.T @ self.qty
+        params = np.linalg.solve(r, qtz)
+        rss = float(self.qty @ self.qty - qtz @ qtz) + self.outside_rss
+        k = len(columns)
+        df_resid = self.n - k
+        sigma2 = rss / df_resid
+        r_inv = np.linalg.inv(r)
+        se = np.sqrt(sigma2 * (r_inv ** 2).sum(axis=1))
+        t = params / se
+        margin = stats.t.ppf(0.975, df_resid) * se
+        table = pd.DataFrame({'coef': params, 'std err': se, 't': t, 'P>|t|': 2 * stats.t.sf(np.abs(t), df_resid),
+                              '[0.025': params - margin, '0.975]': params + margin},
+                             index=['const'] + variables)
+        r2 = 1 - rss / self.tss
+        return {'table': table,
+                'variables': variables,
+                'r2': r2,
+                'adj_r2': 1 - (1 - r2) * (self.n - 1) / df_resid,
+                'aic': self.n * (np.log(2 * np.pi * rss / self.n) + 1) + 2 * k, #same log-likelihood as statsmodels
+                'n': self.n}
+
+    def stepwise(self):
+        # forward selection by AIC
+        chosen = []
+        best = self.fit(chosen)['aic']
+        while len(chosen) < len(self.candidates):
+            scores = {column: self.fit(chosen + [column]) for column in self.candidates if column not in chosen}
+            scores = {column: result['aic'] for column, result in scores.items() if result is not None}
+            if not scores:
+                break
+            column = min(scores, key=scores.get)
+            if scores[column] >= best:
+                break
+            chosen.append(column)
+            best = scores[column]
+        return chosen
+
+    def batch(self):
+        # every single-regressor model, the full model and the forward stepwise path in one table
+        models = {column: [column] for column in self.candidates}
+        models['All regressors'] = self.candidates
+        path = self.stepwise()
+        for i in range(1, len(path) + 1):
+            models['Stepwise, step {}'.format(i)] = path[:i]
+        rows = []
+        for name, variables in models.items():
+            result = self.fit(variables)
+            if result is None:
+                continue
+            rows.append({'model': name, 'regressors': ', '.join(result['variables']),
+                         'R-squared': result['r2'], 'Adj. R-squared': result['adj_r2'], 'AIC': result['aic']})
+        return pd.DataFrame(rows)
@@ -0,0 +1,80 @@
+import sys
+import pandas as pd
+import data_store
+import views
+
+# column types of every dataset: country names and codes as categories, nutrient values and rates as float32,
+# the GDD strata (age, female, urban, edu, year) as small integers; a None type drops the column at load time
+# columns that are not declared follow the dataset's `rest` rule: 'drop', or 'float32' for numeric ones
+# (so that every food type in the nutrition files reaches the pie chart); 'Unnamed: ...' index columns always go
+CODES = {'age': 'int16', 'female': 'int16', 'urban': 'int16', 'edu': 'int16', 'year': 'int16'}
+UNUSED_NUTRIENTS = dict.fromkeys(views.MICRONUTRIENTS + views.MACRONUTRIENTS + ['Dietary Sodium', 'sum_food'])
+
+
+def _float32(columns):
+    return dict.fromkeys(columns, 'float32')
+
+
+SCHEMAS = {
+    'excess_mortality': ({'Country': 'category', 'iso3c': 'category',
+                          **_float32(['COVID-19 deaths', 'Excess deaths', 'Excess per 100k', 'Undercount ratio'])}, 'drop'),
+    'nutrition_percent': ({'iso3': 'category', **CODES, **UNUSED_NUTRIENTS}, 'float32'),
+    'nutrition_total': ({'iso3': 'category', **CODES, **UNUSED_NUTRIENTS}, 'float32'),
+    'iso': ({'iso3c': 'category', 'country_name': 'category'}, 'drop'),
+    'nutrition_obesity_by_gender': ({'Country Name': 'category', 'iso3': 'category', 'female': 'int16', 'Value': 'float32',
+                                     **_float32(views.FOODS)}, 'drop'),
+    'obesity': ({'Country Name': 'category', 'Country Code': 'category', 'Indicator Name': 'category',
+                 'Year': 'int16', 'Value': 'float32'}, 'drop'),
+    'nutrition_and_covid': ({'Country': 'category', 'Excess deaths': 'float32',
+                             **_float32(views.MICRONUTRIENTS + views.MACRONUTRIENTS)}, 'drop'),
+    'macronutrition_and_obesity': ({'Country Name': 'category', 'iso3': 'category', 'female': 'int16', 'Value': 'float32',
+                                    **_float32(views.MACRONUTRIENTS + ['Dietary Sodium'])}, 'drop'),
+}
+
+
+def columns(name, available):
+    # the columns worth reading from the snapshot
+    dtypes, rest = SCHEMAS[name]
+    return [column for column in available
+            if not column.startswith('Unnamed:') and dtypes.get(column, rest) is not None
+            and (column in dtypes or rest != 'drop')]
+
+
+def apply(name, df):
+    dtypes, rest = SCHEMAS[name]
+    df = df[columns(name, df.columns)]
+    types = {}
+    for column in df.columns:
+        dtype = dtypes.get(column)
+        if dtype is None and pd.api.types.is_numeric_dtype(df[column]):
+            dtype = rest
+        if dtype is not None and not (dtype.startswith('int') and df[column].isna().any()): #missing values keep the column as it is
+            types[column] = dtype
+    return views.freeze(df.astype(types))
+
+
+def load(name):
+    # typed, read-only frame; safe to share between all sessions
+    return apply(name, data_store.load(name, columns=lambda available: columns(name, available)))
+
+
+def memory_report(names=None, users=(1, 10, 100)):
+    # bytes of the raw frame (every column, default dtypes) against the typed one, and what that means for
+    # N sessions if each had to keep its own copy of the raw frame (the only safe way with mutable cached frames)
+    # against one typed frame shared by all of them
+    rows = []
+    for name in names or data_store.SOURCES:
+        raw = int(data_store.load(name).memory_usage(deep=True).sum())
+        typed = int(load(name).memory_usage(deep=True).sum())
+        row = {'dataset': name, 'raw bytes': raw, 'typed bytes': typed, 'saving': 1 - typed / raw}
+        for n in users:
+            row['{} users, copies'.format(n)] = n * raw
+            row['{} users, shared'.format(n)] = typed
+        rows.append(row)
+    return pd.DataFrame(rows).set_index('dataset')
+
+
+if __name__ == '__main__':
+    #python schema.py [name ...] prints the memory report for the snapshots on disk
+    pd.set_option('display.width', 200)
+    print(memory_report(sys.argv[1:] or None))
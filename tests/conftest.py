@@ -0,0 +1,31 @@
+import os
+import sys
+import functools
+import threading
+import http.server
+import pytest
+
+# the modules live at the top of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import data_store
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def upstream(tmp_path, monkeypatch):
+    # a local stand-in for the GitHub raw urls serving the files written to the returned folder,
+    # with the store's snapshots in a folder of their own
+    source = tmp_path / 'upstream'
+    source.mkdir()
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(_QuietHandler, directory=str(source)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(data_store, 'BASE_URL', 'http://127.0.0.1:{}/'.format(server.server_address[1]))
+    monkeypatch.setattr(data_store, 'SNAPSHOT_DIR', str(tmp_path / 'snapshots'))
+    monkeypatch.setattr(data_store, 'OFFLINE', False)
+    yield source
+    server.shutdown()
+    server.server_close()
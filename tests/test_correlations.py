@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+import correlations
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame(rng.normal(size=(60, 4)), columns=['a', 'b', 'c', 'target'])
+    df['b'] += df['target'] #one strong correlation
+    df.loc[rng.choice(60, 10, replace=False), 'a'] = np.nan #pairwise missing values
+    df.loc[[0, 1], 'target'] = np.nan
+    return df
+
+
+@pytest.mark.parametrize('method, reference', [('pearson', stats.pearsonr), ('spearman', stats.spearmanr)])
+def test_matches_scipy(frame, method, reference):
+    table = correlations.correlate(frame, ['a', 'b', 'c'], 'target', methods=(method,), n_boot=200)
+    for column in ['a', 'b', 'c']:
+        pairs = frame[[column, 'target']].dropna()
+        r, p_value = reference(pairs[column], pairs['target'])
+        row = correlations.lookup(table, column, method)
+        assert row['n'] == len(pairs)
+        assert row['r'] == pytest.approx(r)
+        assert row['p_value'] == pytest.approx(p_value)
+        assert row['ci_low'] <= row['r'] <= row['ci_high']
+
+
+def test_bootstrap_is_reproducible(frame):
+    first = correlations.correlate(frame, ['a', 'b'], 'target', n_boot=100, seed=3)
+    second = correlations.correlate(frame, ['a', 'b'], 'target', n_boot=100, seed=3)
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_strongest_sorts_by_absolute_r(frame):
+    table = correlations.strongest(correlations.correlate(frame, ['a', 'b', 'c'], 'target', n_boot=10))
+    assert table['variable'][0] == 'b'
+    assert list(table['r'].abs()) == sorted(table['r'].abs(), reverse=True)
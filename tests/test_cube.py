@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+import cube
+
+LABELS = {'Female': 'Prevalence of obesity, female (% of female population ages 18+)',
+          'Male': 'Prevalence of obesity, male (% of male population ages 18+)'}
+
+
+def long_table(years, countries, seed=0):
+    # the World Bank layout, with the World aggregate the cube leaves out
+    rng = np.random.default_rng(seed)
+    rows = [{'Country Name': country, 'Indicator Name': LABELS[gender], 'Year': year, 'Value': rng.random() * 40}
+            for year in years for gender in cube.GENDERS for country in countries + ['World']]
+    df = pd.DataFrame(rows).astype({'Country Name': 'category', 'Indicator Name': 'category',
+                                    'Year': 'int16', 'Value': 'float32'})
+    return df.sample(frac=1, random_state=seed).reset_index(drop=True) #the order of the rows does not matter
+
+
+def assert_same(left, right):
+    np.testing.assert_array_equal(left.years, right.years)
+    np.testing.assert_array_equal(left.countries, right.countries)
+    np.testing.assert_array_equal(left.values, right.values)
+    for year in right.years:
+        for gender in cube.GENDERS:
+            pd.testing.assert_frame_equal(left.top(year, gender), right.top(year, gender))
+
+
+def test_top_and_mean_match_pandas():
+    df = long_table([2000, 2001], ['A', 'B', 'C', 'D'])
+    obesity = cube.ObesityCube.from_long(df)
+    rows = df[(df['Year'] == 2001) & (df['Indicator Name'] == LABELS['Male']) & (df['Country Name'] != 'World')]
+    expected = rows.sort_values('Value', ascending=False).head(3)
+    assert list(obesity.top(2001, 'Male', 3)['Country Name']) == list(expected['Country Name'])
+    assert obesity.mean(2001, 'Male') == pytest.approx(rows['Value'].mean())
+    assert 'World' not in obesity.countries
+
+
+def test_update_matches_a_rebuild():
+    old = long_table([2000, 2001], ['A', 'B', 'C'], seed=1)
+    new = long_table([2003], ['B', 'C', 'D'], seed=2) #a new year, with a new country and one missing
+    assert_same(cube.ObesityCube.from_long(old).update(new), cube.ObesityCube.from_long(pd.concat([old, new])))
+
+
+def test_update_replaces_a_year():
+    old = long_table([2000, 2001], ['A', 'B'], seed=1)
+    new = long_table([2001], ['A', 'B'], seed=3)
+    expected = cube.ObesityCube.from_long(pd.concat([old[old['Year'] == 2000], new]))
+    assert_same(cube.ObesityCube.from_long(old).update(new), expected)
+
+
+def test_missing_countries_rank_last():
+    df = long_table([2000], ['A', 'B', 'C'])
+    female = df['Indicator Name'] == LABELS['Female']
+    for country, value in [('A', 10.0), ('B', np.nan), ('C', 30.0)]:
+        df.loc[female & (df['Country Name'] == country), 'Value'] = value
+    obesity = cube.ObesityCube.from_long(df)
+    assert list(obesity.top(2000, 'Female')['Country Name']) == ['C', 'A']
+    assert list(obesity.top(2000, 'Female', 2)['Country Name']) == ['C', 'A'] #B does not take one of the two places
+
+
+def test_missing_years_and_countries_raise():
+    obesity = cube.ObesityCube.from_long(long_table([2000, 2002], ['A', 'B']))
+    for year in [1999, 2001, 2003]:
+        with pytest.raises(KeyError):
+            obesity.top(year, 'Female')
+    with pytest.raises(KeyError):
+        obesity.trend('C', 'Female')
+    assert list(obesity.trend('A', 'Male').index) == [2000, 2002]
@@ -0,0 +1,87 @@
+import os
+import time
+import threading
+import pytest
+import data_store
+
+# the store against a local stand-in for the GitHub raw urls (the upstream fixture of conftest.py)
+
+
+def publish(source, text, age=0):
+    # (re)writes the upstream iso.csv; `age` moves its mtime so Last-Modified changes within the same second
+    path = source / data_store.SOURCES['iso']
+    path.write_text(text)
+    stamp = time.time() + age
+    os.utime(path, (stamp, stamp))
+
+
+def test_fetched_then_not_modified(upstream):
+    publish(upstream, 'iso3c,country_name\nFRA,France\n')
+    assert data_store.fetch('iso') == 'fetched'
+    version = data_store.version('iso')
+    assert data_store.fetch('iso') == 'not-modified'
+    assert data_store.version('iso') == version
+    assert list(data_store.load('iso')['country_name']) == ['France']
+
+
+def test_changed_source_is_fetched_again(upstream):
+    publish(upstream, 'iso3c,country_name\nFRA,France\n')
+    data_store.fetch('iso')
+    version = data_store.version('iso')
+    publish(upstream, 'iso3c,country_name\nFRA,France\nITA,Italy\n', age=10)
+    assert data_store.fetch('iso') == 'fetched'
+    assert data_store.version('iso') != version
+    assert len(data_store.load('iso')) == 2
+
+
+def test_offline_never_fetches(upstream, monkeypatch):
+    publish(upstream, 'iso3c,country_name\nFRA,France\n')
+    monkeypatch.setattr(data_store, 'OFFLINE', True)
+    assert data_store.fetch('iso') == 'offline'
+    with pytest.raises(FileNotFoundError):
+        data_store.load('iso')
+
+
+def test_missing_source_fails(upstream):
+    assert data_store.fetch('iso') == 'failed: HTTP 404'
+
+
+def test_unparsable_source_keeps_the_old_snapshot(upstream):
+    publish(upstream, 'iso3c,country_name\nFRA,France\n')
+    data_store.fetch('iso')
+    version = data_store.version('iso')
+    publish(upstream, 'iso3c,country_name\nFRA,France\nITA,Italy,x,y\n', age=10)
+    assert data_store.fetch('iso').startswith('failed: ParserError')
+    assert data_store.version('iso') == version
+    assert list(data_store.load('iso')['country_name']) == ['France']
+
+
+def test_refresh_in_background_only_waits_for_missing_snapshots(upstream):
+    publish(upstream, 'iso3c,country_name\nFRA,France\n')
+    data_store.fetch('iso')
+    (upstream / data_store.SOURCES['excess_mortality']).write_text('Country,iso3c\nFrance,FRA\n')
+    running = set(threading.enumerate())
+    status = data_store.refresh_in_background(['iso', 'excess_mortality'])
+    assert status == {'iso': 'revalidating', 'excess_mortality': 'fetched'}
+    for thread in set(threading.enumerate()) - running: #the revalidation of iso, before the server goes away
+        thread.join(5)
+    assert len(data_store.load('excess_mortality')) == 1
+
+
+def test_concurrent_writers_never_publish_half_a_file(upstream):
+    rows = [b'iso3c,country_name\n' + b'FRA,France\n' * (1000 * (i + 1)) for i in range(8)]
+    errors = []
+
+    def write(raw):
+        try:
+            data_store._write_snapshot('iso', raw, {})
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=write, args=(raw,)) for raw in rows]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(data_store.load('iso')) in [1000 * (i + 1) for i in range(8)]
+    assert [name for name in os.listdir(data_store.SNAPSHOT_DIR) if name.endswith('.tmp')] == []
@@ -0,0 +1,87 @@
+import os
+import time
+import pandas as pd
+import pytest
+import bench
+import data_store
+import export
+import plots
+
+# three exports of the fixture data: everything, nothing (all up to date), then only what a changed dataset feeds
+
+
+@pytest.fixture
+def report(upstream, tmp_path):
+    bench.write_fixtures(str(upstream), countries=3, years=range(2015, 2017))
+    return str(tmp_path / 'report')
+
+
+def run(report):
+    lines = []
+    manifest = export.export(report, formats=['json'], workers=2, log=lines.append)
+    return manifest, int(lines[0].split(' rendered')[0].split(': ')[1])
+
+
+def modified(report, manifest):
+    return {view: os.stat(os.path.join(report, entry['files']['json'])).st_mtime_ns for view, entry in manifest.items()}
+
+
+def republish(upstream, name, frame):
+    # a new upstream version of a dataset, with a later Last-Modified so the store fetches it again
+    path = upstream / data_store.SOURCES[name]
+    frame.to_csv(path, index=False)
+    stamp = time.time() + 10
+    os.utime(path, (stamp, stamp))
+
+
+def test_incremental_export(report, upstream):
+    manifest, rendered = run(report)
+    assert rendered == len(manifest) == len(export.keys())
+    first = modified(report, manifest)
+
+    manifest, rendered = run(report)
+    assert rendered == 0
+    assert modified(report, manifest) == first
+
+    excess = pd.read_csv(upstream / data_store.SOURCES['excess_mortality'])
+    republish(upstream, 'excess_mortality', excess.assign(**{'Excess deaths': excess['Excess deaths'] + 1}))
+    manifest, rendered = run(report)
+    changed = {view for view, stamp in modified(report, manifest).items() if stamp != first[view]}
+    assert changed == {view for view in manifest if view.startswith('covid/')}
+    assert rendered == len(changed) == 4
+
+
+def test_chart_mode_and_removed_views(report, upstream, monkeypatch):
+    manifest, _ = run(report)
+    monkeypatch.setattr(plots, 'COMPACT', False)
+    _, rendered = run(report)
+    assert rendered == len([view for view in manifest if view.split('/')[0] in export.CHART_MODE_KINDS])
+
+    nutrition = pd.read_csv(upstream / data_store.SOURCES['nutrition_percent'], index_col=0)
+    republish(upstream, 'nutrition_percent', nutrition[nutrition['iso3'] != 'C002'])
+    gone = os.path.join(report, manifest['pie/C002']['files']['json'])
+    manifest, rendered = run(report)
+    assert 'pie/C002' not in manifest and not os.path.exists(gone)
+    assert rendered == 2 #the two pies left
+
+
+def test_prerendered_matches_stamps(report, upstream, monkeypatch):
+    run(report)
+    built = []
+
+    def build():
+        built.append(1)
+        return 'built'
+    assert export.prerendered('covid/map', build, report).to_plotly_json()['data']
+    assert export.prerendered('food/Tea/Female', build, report) != 'built'
+    assert built == []
+
+    monkeypatch.setattr(plots, 'COMPACT', False) #a chart mode the export was not rendered in
+    assert export.prerendered('covid/map', build, report) == 'built'
+    assert export.prerendered('food/Tea/Female', build, report) != 'built' #not drawn differently
+
+    frame = pd.read_csv(upstream / data_store.SOURCES['nutrition_obesity_by_gender'], index_col=0)
+    republish(upstream, 'nutrition_obesity_by_gender', frame.assign(Tea=frame['Tea'] * 2))
+    data_store.refresh_all()
+    assert export.prerendered('food/Tea/Female', build, report) == 'built'
+    assert export.prerendered('missing/view', build, report) == 'built'
@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+import data_store
+import ingest
+
+# a few small files in the layout of the GDD country-level estimates
+FILES = {'v01': 'fruits', 'v17': 'Coffee', 'v35': 'Added sugars'}
+
+
+@pytest.fixture
+def source(tmp_path):
+    folder = tmp_path / 'gdd'
+    folder.mkdir()
+    for i, code in enumerate(FILES):
+        rows = [{'iso3': iso3, 'age': 999, 'female': female, 'urban': 999, 'edu': 999, 'year': year,
+                 'median': 10 * i + female + (year - 2015) / 10, 'lowerci_95': 0.0, 'upperci_95': 99.0}
+                for iso3 in ['FRA', 'ITA'] for female in [0, 1] for year in [2015, 2018]]
+        if code == 'v35':
+            rows = rows[1:] #FRA, male, 2015 has no added sugars estimate: the join drops that stratum
+        pd.DataFrame(rows).to_csv(folder / (code + '_cnty.csv'), index=False)
+    return folder
+
+
+def test_filters_years_and_joins_on_the_keys(source, tmp_path):
+    table, timings = ingest.ingest(source, tmp_path / 'out', years=[2018], workers=1, chunksize=3, log=lambda line: None)
+    assert sorted(table.columns) == sorted(ingest.KEYS + list(FILES.values()))
+    assert set(table['year']) == {2018}
+    assert len(table) == 4
+    row = table[(table['iso3'] == 'ITA') & (table['female'] == 1)].iloc[0]
+    assert (row['fruits'], row['Coffee'], row['Added sugars']) == pytest.approx((1.3, 11.3, 21.3))
+    assert len(data_store.load_partitioned(str(tmp_path / 'out'), year=2018)) == 4
+
+
+def test_all_years_and_the_missing_stratum(source, tmp_path):
+    ingest.main([str(source), str(tmp_path / 'out'), '--years', 'all', '--workers', '1'])
+    gdd = data_store.load_partitioned(str(tmp_path / 'out'))
+    assert gdd['year'].astype(int).value_counts().to_dict() == {2015: 3, 2018: 4}
+
+
+def test_ingesting_a_year_again_replaces_its_partition(source, tmp_path):
+    output = str(tmp_path / 'out')
+    ingest.ingest(source, output, years=None, workers=1, log=lambda line: None)
+    ingest.ingest(source, output, years=[2018], workers=1, log=lambda line: None)
+    assert len(data_store.load_partitioned(output, year=2018)) == 4
+    assert len(data_store.load_partitioned(output, year=2015)) == 3
+
+
+def test_no_gdd_files(tmp_path, capsys):
+    with pytest.raises(FileNotFoundError):
+        ingest.ingest(tmp_path, tmp_path / 'out', log=lambda line: None)
+    with pytest.raises(SystemExit):
+        ingest.main([str(tmp_path), str(tmp_path / 'out')])
+    assert 'no vNN_cnty.csv files' in capsys.readouterr().err
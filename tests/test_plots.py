@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+import statsmodels.api as sm
+import plots
+
+
+def close(compact, full):
+    # the compact values are rounded to 4 significant digits of the largest one
+    compact, full = np.asarray(compact, dtype=float), np.asarray(full, dtype=float)
+    np.testing.assert_allclose(compact, full, rtol=0, atol=1e-3 * np.nanmax(np.abs(full)))
+
+
+def per_country(fig, attribute):
+    # px draws one trace per country; in row order, since every country appears once
+    return np.concatenate([np.ravel(attribute(trace)) for trace in fig.data])
+
+
+@pytest.fixture
+def nutrients():
+    rng = np.random.default_rng(4)
+    return pd.DataFrame({'Country Name': ['Country {}'.format(i) for i in range(12)], 'female': 1,
+                         'Value': rng.random(12) * 40, 'Excess deaths': rng.random(12) * 1e5,
+                         'Added sugars': [0.02, 0.04, 0.12, 0.6] + list(rng.random(8) * 0.5)})
+
+
+@pytest.mark.parametrize('build', [plots.macronutrient_scatter,
+                                   lambda df, element, compact: plots.micronutrient_scatter(
+                                       df.rename(columns={'Country Name': 'Country'}), element, compact)])
+def test_compact_scatter_matches_px(nutrients, build):
+    compact = build(nutrients, 'Added sugars', True)
+    full = build(nutrients, 'Added sugars', False)
+    trace = compact.data[0]
+    close(trace.x, per_country(full, lambda t: t.x))
+    close(trace.y, per_country(full, lambda t: t.y))
+    close(trace.marker.size, per_country(full, lambda t: t.marker.size))
+    assert (np.asarray(trace.marker.size) > 0).all() #small values keep a marker
+    assert trace.marker.sizeref == pytest.approx(full.data[0].marker.sizeref)
+    assert trace.marker.sizemode == full.data[0].marker.sizemode
+
+
+def test_compact_map_matches_px():
+    excess = pd.DataFrame({'Country': ['A', 'B', 'C'], 'iso3c': ['AAA', 'BBB', 'CCC'],
+                           'COVID-19 deaths': [10, 2000, 30], 'Excess deaths': [5.5, 12000.25, 1.0],
+                           'Excess per 100k': [0.01, 250.0, 3.5], 'size': [5.5, 12000.25, 1.0]})
+    compact = plots.excess_map(excess, True)
+    full = plots.excess_map(excess, False)
+    close(compact.data[0].marker.size, per_country(full, lambda t: t.marker.size))
+    assert compact.data[0].marker.sizeref == pytest.approx(full.data[0].marker.sizeref)
+    close(compact.data[0].customdata[:, 2], excess['Excess per 100k'])
+
+
+def test_rounding_keeps_small_values_apart():
+    assert list(plots._rounded([0.02, 0.04, 0.12, 0.6])) == [0.02, 0.04, 0.12, 0.6]
+    assert list(plots._rounded([0.0012, 0.0034])) == [0.0012, 0.0034]
+    assert list(plots._rounded([123456.789, 1.0])) == [123456.79, 1.0] #never fewer than 2 decimals
+    assert plots._rounded(np.array([1, 2])).dtype.kind == 'i'
+    assert np.isnan(plots._rounded([np.nan, 1.5])[0])
+
+
+def test_regression_line_matches_statsmodels():
+    rng = np.random.default_rng(5)
+    x = rng.random(40) * 30
+    y = 0.3 * x + rng.normal(size=40)
+    x[[2, 9]] = np.nan #pairs with a missing value are left out
+    y[[5]] = np.nan
+    grid, fit, low, high = plots.regression_line(x, y, points=25)
+    keep = ~np.isnan(x) & ~np.isnan(y)
+    model = sm.OLS(y[keep], sm.add_constant(x[keep])).fit()
+    prediction = model.get_prediction(sm.add_constant(grid))
+    band = prediction.conf_int(alpha=0.05)
+    np.testing.assert_allclose(grid[[0, -1]], [x[keep].min(), x[keep].max()])
+    np.testing.assert_allclose(fit, prediction.predicted_mean)
+    np.testing.assert_allclose(low, band[:, 0])
+    np.testing.assert_allclose(high, band[:, 1])
+
+
+def test_food_regression_plot_skips_missing_pairs():
+    df = pd.DataFrame({'Value': [10.0, 20.0, np.nan, 30.0, 40.0], 'Tea': [1.0, 2.5, 3.0, np.nan, 4.2]})
+    fig = plots.food_regression_plot(df, 'Tea')
+    band, line, points = fig.data
+    assert np.isfinite(np.asarray(line.y, dtype=float)).all()
+    assert np.isfinite(np.asarray(band.y, dtype=float)).all()
+    assert len(points.x) == 5 #every country is still drawn, only the fit leaves the incomplete ones out
@@ -0,0 +1,53 @@
+import json
+import time
+import logging
+import pytest
+import profiling
+
+
+@pytest.fixture
+def section(monkeypatch):
+    monkeypatch.setattr(profiling, 'ENABLED', True)
+    monkeypatch.setattr(profiling, 'MEMORY', False)
+    profiling.start_run()
+    profiling.mark('section')
+
+
+def sleeper(kind, seconds, *nested):
+    # a profiled function that calls `nested` and then works for `seconds` itself
+    def function():
+        for call in nested:
+            call()
+        time.sleep(seconds)
+    return profiling.timed(kind, function)
+
+
+def test_nested_calls_are_counted_once(section):
+    fit = sleeper('pandas', 0.05)
+    batch = sleeper('pandas', 0.02, fit, fit) #Design.batch calling Design.fit
+    px_call = sleeper('plotting', 0.03)
+    builder = sleeper('plotting', 0.01, px_call, batch) #a plots builder calling px and doing pandas work
+    builder()
+    time.sleep(0.02) #not profiled
+    profiling.finish()
+    record = profiling.records()[0]
+    assert 0.12 <= record['pandas'] < 0.15
+    assert 0.04 <= record['plotting'] < 0.07
+    assert record['pandas'] + record['plotting'] <= record['wall']
+    assert record['wall'] >= 0.18
+
+
+def test_records_are_logged_as_json(section, caplog):
+    with caplog.at_level(logging.INFO, logger='examen.profiling'):
+        sleeper('plotting', 0.01)()
+        profiling.finish()
+    assert json.loads(caplog.records[-1].getMessage())['section'] == 'section'
+
+
+def test_nothing_is_recorded_outside_a_section(monkeypatch):
+    monkeypatch.setattr(profiling, 'ENABLED', False)
+    profiling.start_run()
+    profiling.mark('section')
+    sleeper('pandas', 0.0)()
+    profiling.finish()
+    assert profiling.records() == []
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+import statsmodels.api as sm
+import regression
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame(rng.normal(size=(80, 4)), columns=['a', 'b', 'c', 'd'])
+    df['female'] = rng.integers(0, 2, 80)
+    df['Value'] = 2 * df['a'] - df['b'] + 5 * df['female'] + rng.normal(size=80)
+    df.loc[[3, 7], 'c'] = np.nan #listwise deletion
+    return df
+
+
+@pytest.mark.parametrize('variables', [['a'], ['a', 'b', 'female'], ['a', 'b', 'c', 'd', 'female']])
+def test_matches_statsmodels(frame, variables):
+    design = regression.Design(frame, ['a', 'b', 'c', 'd', 'female'])
+    result = design.fit(variables)
+    data = frame[design.candidates + ['Value']].dropna()
+    reference = sm.OLS(data['Value'], sm.add_constant(data[variables])).fit()
+    np.testing.assert_allclose(result['table']['coef'], reference.params)
+    np.testing.assert_allclose(result['table']['std err'], reference.bse)
+    np.testing.assert_allclose(result['table']['P>|t|'], reference.pvalues)
+    assert result['r2'] == pytest.approx(reference.rsquared)
+    assert result['adj_r2'] == pytest.approx(reference.rsquared_adj)
+    assert result['aic'] == pytest.approx(reference.aic)
+    assert result['n'] == reference.nobs
+
+
+def test_constant_candidates_are_dropped(frame):
+    design = regression.Design(frame.assign(e=1.0), ['a', 'e'])
+    assert design.candidates == ['a']
+
+
+def test_too_few_rows(frame):
+    design = regression.Design(frame.head(4), ['a', 'b', 'c', 'd'])
+    assert design.fit(['a']) is not None
+    assert design.fit(['a', 'b', 'c', 'd']) is None
+    assert 'observations' in design.problem(['a', 'b', 'c', 'd'])
+
+
+def test_collinear_regressors(frame):
+    design = regression.Design(frame.assign(e=frame['a'] + frame['b']), ['a', 'b', 'e'])
+    assert design.fit(['a', 'b']) is not None
+    assert design.fit(['a', 'b', 'e']) is None
+    assert 'linear combinations' in design.problem(['a', 'b', 'e'])
+    assert 'All regressors' not in set(design.batch()['model'])
+
+
+def test_stepwise_picks_the_true_regressors(frame):
+    design = regression.Design(frame, ['a', 'b', 'c', 'd', 'female'])
+    assert set(design.stepwise()[:3]) == {'a', 'b', 'female'}
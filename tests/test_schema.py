@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import data_store
+import schema
+
+
+def test_columns_drops_index_columns_unused_nutrients_and_undeclared_columns():
+    available = ['Unnamed: 0', 'iso3', 'year', 'Tea', 'Zinc', 'sum_food']
+    assert schema.columns('nutrition_percent', available) == ['iso3', 'year', 'Tea'] #rest 'float32' keeps Tea
+    assert schema.columns('excess_mortality', ['Unnamed: 0', 'Country', 'Excess deaths', 'Notes']) == [
+        'Country', 'Excess deaths'] #rest 'drop'
+
+
+def test_apply_types():
+    raw = pd.DataFrame({'Unnamed: 0': [0, 1], 'iso3': ['FRA', 'ITA'], 'year': [2018, 2018], 'female': [1, 0],
+                        'Tea': [1.5, 2.5], 'Zinc': [3.0, 4.0], 'source': ['a', 'b']})
+    typed = schema.apply('nutrition_percent', raw)
+    assert list(typed.columns) == ['iso3', 'year', 'female', 'Tea', 'source']
+    assert typed['iso3'].dtype == 'category'
+    assert typed['year'].dtype == np.int16 and typed['female'].dtype == np.int16
+    assert typed['Tea'].dtype == np.float32 #undeclared numeric column, rest 'float32'
+    assert list(typed['source']) == ['a', 'b'] #rest only applies to numeric columns
+    assert not pd.api.types.is_numeric_dtype(typed['source']) and typed['source'].dtype != 'category'
+
+
+def test_int_columns_with_missing_values_keep_their_type():
+    raw = pd.DataFrame({'Country Name': ['A', 'B'], 'female': [1.0, np.nan], 'Value': [30.0, 20.0]})
+    typed = schema.apply('nutrition_obesity_by_gender', raw)
+    assert typed['female'].dtype == np.float64
+    assert typed['Value'].dtype == np.float32
+
+
+def test_load_reads_only_the_declared_columns(upstream):
+    pd.DataFrame({'Country': ['A'], 'iso3c': ['AAA'], 'Excess deaths': [10.0], 'Notes': ['x']}).to_csv(
+        upstream / data_store.SOURCES['excess_mortality'])
+    typed = schema.load('excess_mortality')
+    assert list(typed.columns) == ['Country', 'iso3c', 'Excess deaths']
+    assert typed['Country'].dtype == 'category' and typed['Excess deaths'].dtype == np.float32
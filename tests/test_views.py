@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+import views
+
+
+@pytest.fixture
+def frozen():
+    df = pd.DataFrame({'rate': np.arange(3, dtype='float32'), 'year': np.arange(3, dtype='int16'),
+                       'country': pd.Categorical(['France', 'Italy', 'France']),
+                       'note': pd.Series(['a', 'b', 'c'], dtype=object)})
+    return views.freeze(df)
+
+
+@pytest.mark.parametrize('column', ['rate', 'year', 'country', 'note'])
+def test_frozen_columns_reject_in_place_edits(frozen, column):
+    with pytest.raises(ValueError, match='read-only'):
+        frozen[column].array[0] = frozen[column].array[1]
+    with pytest.raises(ValueError, match='read-only'):
+        frozen.loc[0, column] = frozen.loc[1, column]
+
+
+def test_freeze_leaves_the_original_writable():
+    df = pd.DataFrame({'rate': np.arange(3.0)})
+    views.freeze(df)
+    df.loc[0, 'rate'] = 5.0
+    assert df['rate'][0] == 5.0
+
+
+def test_covid_views_are_frozen():
+    excess = pd.DataFrame({'Country': ['A', 'B'], 'Excess deaths': [-3.0, 10.0], 'COVID-19 deaths': [1, 2],
+                           'Excess per 100k': [0.5, 2.0], 'Undercount ratio': [1.0, 3.0]})
+    covid = views.covid(excess)
+    assert list(covid['map']['size']) == [1.0, 10.0]
+    assert list(covid['rankings']['Excess Deaths per 100k']['Country']) == ['B', 'A']
+    with pytest.raises(ValueError, match='read-only'):
+        covid['map'].loc[0, 'size'] = 0.0
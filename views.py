@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+# tables derived from the raw datasets, built once per dataset version and never modified afterwards
+# the app only looks things up in them (country, gender, ranking) instead of filtering the raw frames on every rerun
+
+NON_FOOD_COLUMNS = ['Unnamed: 0', 'Unnamed: 0_x', 'Unnamed: 0_y', 'iso3', 'iso3c', 'age', 'female', 'urban', 'edu',
+                    'year', 'Vitamin B9', 'Vitamin B3', 'Vitamin B2', 'Zinc',
+                    'Vitamin E', 'Vitamin D', 'Vitamin C', 'Vitamin B12', 'Vitamin B6',
+                    'Vitamin A', 'Selenium', 'Potassium', 'Magnesium', 'Iron', 'Iodine',
+                    'Dietary Sodium', 'Calcium', 'Added sugars', 'Dietary fiber',
+                    'Dietary cholesterol', 'Plant omega-3 fat', 'Seafood omega-3 fat',
+                    'Total omega-6 fat', 'Monounsaturated fatty acids', 'Saturated fat',
+                    'Total protein', 'Total carbohydrates', 'sum_food', 'country_name']
+OBESITY_LABELS = {'Prevalence of obesity, female (% of female population ages 18+)': 'Female',
+                  'Prevalence of obesity, male (% of male population ages 18+)': 'Male'}
+FOODS = ['Tea', 'Coffee', 'Fruit juices', 'Sugar-sweetened beverages',
+         'Yoghurt (including fermented milk)', 'Cheese', 'Eggs',
+         'Total seafoods', 'Unprocessed red meats', 'Total processed meats',
+         'Whole grains', 'Refined grains', 'nuts and seeds', 'beans and legumes',
+         'potatoes', 'non-starchy vegetables', 'fruits']
+MACRONUTRIENTS = ['Added sugars', 'Dietary fiber', 'Dietary cholesterol', 'Plant omega-3 fat',
+                  'Seafood omega-3 fat',
+                  'Total omega-6 fat', 'Monounsaturated fatty acids', 'Saturated fat',
+                  'Total protein', 'Total carbohydrates']
+MICRONUTRIENTS = ['Vitamin B9',
+                  'Vitamin B3', 'Vitamin B2', 'Zinc', 'Vitamin E',
+                  'Vitamin D', 'Vitamin C', 'Vitamin B12', 'Vitamin B6', 'Vitamin A',
+                  'Selenium', 'Potassium', 'Magnesium', 'Iron', 'Iodine', 'Calcium']
+COVID_RANKINGS = {'COVID-19 Confirmed Deaths': 'COVID-19 deaths',
+                  'Excess Deaths per 100k': 'Excess per 100k',
+                  'Undercount Ratio': 'Undercount ratio'}
+
+
+def _owner(array):
+    # the array that owns the memory of a view
+    while isinstance(array.base, np.ndarray):
+        array = array.base
+    return array
+
+
+def freeze(df):
+    # read-only copy: the memory of every column (the codes, for categoricals) is marked read-only, so a stray
+    # in-place edit fails instead of corrupting the copy shared by all sessions; copying first makes every column
+    # own its memory, so no writable view of it is left anywhere
+    df = df.copy()
+    for _, series in df.items():
+        values = series.array
+        _owner(values.codes if isinstance(values, pd.Categorical) else series.to_numpy()).flags.writeable = False
+    return df
+
+
+def food_habits(nutrition_percent, iso):
+    # {'countries': {iso3: country name}, 'shares': {iso3: one-column frame of food shares}}
+    merged = nutrition_percent.merge(iso, how='inner', left_on='iso3', right_on='iso3c') #get the country codes to correctly plot the data on the map
+    foods = merged.drop(columns=[column for column in NON_FOOD_COLUMNS if column in merged.columns])
+    countries = dict(zip(merged['iso3'], merged['country_name'].astype(str)))
+    shares = {}
+    for code, (_, row) in zip(merged['iso3'], foods.iterrows()):
+        shares[code] = freeze(row.astype(float).to_frame('food'))
+    return {'countries': countries, 'shares': shares}
+
+
+def female_only(df):
+    return freeze(df[df['female'] == 1].reset_index(drop=True))
+
+
+def covid(excess_mortality):
+    # {'map': frame with a positive marker size, 'rankings': {selectbox option: frame sorted by that measure}}
+    excess_mortality = excess_mortality.copy()
+    excess_mortality['size'] = excess_mortality['Excess deaths'].mask(excess_mortality['Excess deaths'] < 0, 1) #we need to get all excess deaths positive in order to plot it
+    rankings = {option: freeze(excess_mortality.sort_values(by=column, ascending=False).reset_index(drop=True))
+                for option, column in COVID_RANKINGS.items()}
+    return {'map': freeze(excess_mortality), 'rankings': rankings}